@@ -13,11 +13,11 @@
 #
 # --------------------------------------------------------------------------------
 
-import hub
 import utime
 import sys
 import urandom
-import math
+import gamestats
+import gameruntime
 
 
 # global logging function
@@ -30,60 +30,32 @@ def log(s):
 # the index values are - 0 neutral, 1 (top left), 2 (left), 3 (bottom left), 4 (top right), 5 (right), 6 (bottom right)
 PUCK_DIR_VECTORS = ((0, 0), (-1, -1), (-1, 0), (-1, 1),(1, -1), (1, 0), (1, 1))
 
+# the control motor angles between the striker y positions, i.e. > 45, 16 to 45, -15 to 15,
+# -45 to -16 and < -45
+STRIKER_LIMITS = (45, 15, -16, -46)
+
 
 # define a player
 class Player:
-    # controlMotor - the motor used for obtaining the control block position
+    # motorIndex - the index of the control motor in the runtime's input angles
     # strikerX - the x value where this player's sticker is located
     # isPlayer1 - True if the player created is the first player, False otherwise
-    def __init__(self, controlMotor, strikerX, isPlayer1):
-        self._controlMotor = controlMotor
-        # set absolute position
-        self._controlMotor.mode(3)
-        # reset the control motor to 0
-        x = self._controlMotor.get()[0]
-        self._controlMotor.preset(x)
-        self._controlMotor.run_to_position(0, 20)
-        utime.sleep_ms(1000)
-        self._controlMotor.preset(0)
-        # allow the motor to flow when stop
-        self._controlMotor.float()
+    def __init__(self, motorIndex, strikerX, isPlayer1):
+        self._motorIndex = motorIndex
         # reset the current striker position
         self._strikerX = strikerX
         self._strikerY = 2
         self._isPlayer1 = isPlayer1
 
     # Return the striker position in (x, y) format (the value of y is in [0..4])
-    def getStrikerPos(self):
-        y = self._controlMotor.get()[0] # the valu eis between 0 to 359
-        if (y > 180):
-            y = y - 360
-        # now set the striker y position
-        if (y > 45):
-            if (self._isPlayer1):
-                self._strikerY = 0
-            else:
-                self._strikerY = 4
-        elif (y > 15 and y <= 45):
-            if (self._isPlayer1):
-                self._strikerY = 1
-            else:
-                self._strikerY = 3
-        elif (y >= -15 and y <= 15):
-            if (self._isPlayer1):
-                self._strikerY = 2
-            else:
-                self._strikerY = 2
-        elif (y < -15 and y >= -45):
-            if (self._isPlayer1):
-                self._strikerY = 3
-            else:
-                self._strikerY = 1
-        elif (y < -45):
-            if (self._isPlayer1):
-                self._strikerY = 4
-            else:
-                self._strikerY = 0
+    # input - the InputState of the current frame
+    def getStrikerPos(self, input):
+        level = gameruntime.getMotorLevel(input.angles[self._motorIndex], STRIKER_LIMITS)
+        # now set the striker y position, player 2 faces the other way
+        if (self._isPlayer1):
+            self._strikerY = level
+        else:
+            self._strikerY = 4 - level
         # return the striker position
         return (self._strikerX, self._strikerY)
 
@@ -157,7 +129,7 @@ class Puck:
 
 
 # define a game of air hockey
-class AirHockey:
+class AirHockey(gameruntime.Scene):
     # The brightness of the elements that will be shown on the play table
     # tableWidth - width of the table, must be odd number (at tableWidth / 2 print the mid field line)
     # puckBrightness - brightness use for the puck
@@ -169,44 +141,56 @@ class AirHockey:
     # speedIncrement - speed the puck will be increased by until reaching the minSpeed
     # skillLevel - a value between 0 to 100 indicate the likelihood the computer can strike the puck in 1 player mode (100 means 100% hit rate)
     # gameCount - max number of games to play before exiting
-    def __init__(self, tableWidth = 20, puckBrightness = 6, strikerBrightness = 8, playerCount = 1, constSpeed = False, minSpeed = 500, maxSpeed = 50, speedIncrement = 50, skillLevel = 80, gameCount = 3):
+    # hal - the HAL used to reach the hub, a HubHal is created if None
+    def __init__(self, tableWidth = 20, puckBrightness = 6, strikerBrightness = 8, playerCount = 1, constSpeed = False, minSpeed = 500, maxSpeed = 50, speedIncrement = 50, skillLevel = 80, gameCount = 3, hal = None):
         self._tableWidth = tableWidth
         self._puckBrightness = puckBrightness
         self._strikerBrightness = strikerBrightness
-        self._player1 = Player(hub.port.F.motor, self._tableWidth - 1, True)
-        self._player2 = Player(hub.port.E.motor, 0, False)
+        self._hal = hal or gameruntime.HubHal()
+        # motor F controls player 1, motor E controls player 2
+        self._runtime = gameruntime.Runtime(self._hal, ('F', 'E'))
+        self._player1 = Player(0, self._tableWidth - 1, True)
+        self._player2 = Player(1, 0, False)
         self._playerCount = playerCount
         self._constSpeed = constSpeed
         self._minSpeed = minSpeed
         self._maxSpeed = maxSpeed
         self._speedIncrement = speedIncrement
         self._skillLevel = skillLevel
-        self._imgBackground = hub.Image("13131:31313:13131:31313:13131")
+        self._imgBackground = gameruntime.parseImage("13131:31313:13131:31313:13131")
         self._gameCount = gameCount
         self._gamesPlayed = 0
         self._gamesWonByPlayer1 = 0
-        self._img1Player = hub.Image("77770:70007:77770:70007:77770")
-        self._img2Player = hub.Image("00900:77777:80708:08080:08080")
-        self._gameImages = [hub.Image("00900:09900:00900:00900:09990"), hub.Image("09990:00090:09990:00090:09990"), hub.Image("09990:09000:09990:00090:09990"), hub.Image("09990:00090:00900:00900:00900"), hub.Image("09990:09090:09990:00090:09990")]
-        hub.sound.volume(80)
+        self._matchStartTime = 0
+        self._stats = gamestats.ScoreStore()
+        self._img1Player = self._hal.loadImage("77770:70007:77770:70007:77770")
+        self._img2Player = self._hal.loadImage("00900:77777:80708:08080:08080")
+        self._gameImages = [self._hal.loadImage("00900:09900:00900:00900:09990"), self._hal.loadImage("09990:00090:09990:00090:09990"), self._hal.loadImage("09990:09000:09990:00090:09990"), self._hal.loadImage("09990:00090:00900:00900:00900"), self._hal.loadImage("09990:09090:09990:00090:09990")]
+        self._imgTrophy = self._hal.loadImage("09990:07770:03530:00500:06660")
+        self._hal.setVolume(80)
 
     # Refresh the screen of the air hockey table.
+    # renderer - the renderer of the runtime
     # p1 - player 1 pos information (x,y)
     # p2 - player 2 pos information (x,y)
     # ps - status of the puck (self._x, self._y, self._dir, self._striker)
-    def refreshScreen(self, p1, p2, ps):
+    def refreshScreen(self, renderer, p1, p2, ps):
         # clear the screen
-        hub.display.show(self._imgBackground)
+        renderer.clear(self._imgBackground)
         # display striker position + puck position for player 2
         if (ps[0] <= 4):
-            hub.display.pixel(ps[0], ps[1], self._puckBrightness)
-            hub.display.pixel(0, p2[1], self._strikerBrightness)
+            renderer.setPixel(ps[0], ps[1], self._puckBrightness)
+            renderer.setPixel(0, p2[1], self._strikerBrightness)
         # display striker position + puck position for player 1
         elif (ps[0] >= (self._tableWidth - 5)):
-            hub.display.pixel(ps[0] % 5, ps[1], self._puckBrightness)
-            hub.display.pixel(4, p1[1], self._strikerBrightness)
+            renderer.setPixel(ps[0] % 5, ps[1], self._puckBrightness)
+            renderer.setPixel(4, p1[1], self._strikerBrightness)
         else:
-            hub.display.pixel(ps[0] % 5, ps[1], self._puckBrightness)
+            renderer.setPixel(ps[0] % 5, ps[1], self._puckBrightness)
+
+    # draw the current frame, called by the runtime after update()
+    def draw(self, renderer):
+        self.refreshScreen(renderer, self._s1pos, self._s2pos, self._puck.getStatus())
 
     # Generate a direction vector when player 1 strikes.
     # returns a direction vector value.
@@ -239,17 +223,20 @@ class AirHockey:
         playerY = [self._player1._strikerY, [self._computerY, self._player2._strikerY][self._playerCount == 2]][loser - 1]
         puckX = [4, 0][loser - 1]
         puckY = self._puck.getY()
+        renderer = self._runtime.renderer
         for x in range(0, times):
-            hub.display.show(self._imgBackground)
-            hub.display.pixel(puckX, puckY, self._puckBrightness)
-            hub.display.pixel(puckX, playerY, self._strikerBrightness)
+            renderer.clear(self._imgBackground)
+            renderer.setPixel(puckX, puckY, self._puckBrightness)
+            renderer.setPixel(puckX, playerY, self._strikerBrightness)
+            renderer.present()
             utime.sleep_ms(500)
             # flash the loser background
-            hub.display.show(self._imgBackground)
+            renderer.clear(self._imgBackground)
             for y in range(0, 5):
-                hub.display.pixel(puckX, y, 7)
-            hub.display.pixel(puckX, puckY, self._puckBrightness)
-            hub.display.pixel(puckX, playerY, self._strikerBrightness)
+                renderer.setPixel(puckX, y, 7)
+            renderer.setPixel(puckX, puckY, self._puckBrightness)
+            renderer.setPixel(puckX, playerY, self._strikerBrightness)
+            renderer.present()
             utime.sleep_ms(500)
 
     # flashes the colour of the winner
@@ -258,7 +245,7 @@ class AirHockey:
         # play the loser beeps
         s4 = [400, 200]
         for x in s4:
-            hub.sound.beep(x)
+            self._hal.beep(x)
             utime.sleep_ms(300)
         # flash the loser pos
         if (winnerIndex == 1):
@@ -266,12 +253,8 @@ class AirHockey:
         elif (winnerIndex == 2):
             self.flashLoser(1)
         # show winner colour
-        winnerColour = (0, 6, 3) # off, green, blue
-        for x in range(0, 3):
-            hub.led(winnerColour[winnerIndex])
-            utime.sleep_ms(500)
-            hub.led(0)
-            utime.sleep_ms(500)
+        winnerColour = (None, "green", "blue") # off, green, blue
+        gameruntime.flashLed(self._hal, winnerColour[winnerIndex])
 
     # return the next Y position of the puck based on its current travelling direction
     # 1 - 4
@@ -302,6 +285,9 @@ class AirHockey:
         self._initialSpeedSet = True
         self._computerY = 2
         self._currentSpeed = self._minSpeed
+        self.frameMs = self._currentSpeed
+        self._s1pos = (self._tableWidth - 1, 2)
+        self._s2pos = (0, 2)
         puckX = [1, self._tableWidth - 2][player1Start]
         attachedToPlayer = [2, 1][player1Start]
         self._puck = Puck(self._tableWidth, puckX, 2, 0, attachedToPlayer)
@@ -309,92 +295,121 @@ class AirHockey:
     # Display animation for the final match winner
     # winner - 1 or 2
     def showMatchWinner(self, winner):
-        winnerColour = [6, 3][winner - 1]
-        hub.display.clear()
+        winnerColour = ["green", "blue"][winner - 1]
+        self._hal.clear()
         # change the light to represent winner colour
-        hub.led(winnerColour)
+        self._hal.setLed(winnerColour)
         # display a trophy
         for x in range(0, 3):
-            hub.display.show([hub.Image("09990:07770:03530:00500:06660")], fade = 5, delay = 1000)
+            self._hal.showAnimation([self._imgTrophy], 1000, fade = 5)
             utime.sleep_ms(500)
         # turn off the light
-        hub.led(0)
+        self._hal.setLed(None)
+
+    # save the result of the match, this is done after the last game so no file I/O happens during a game.
+    # A 1 player match is ranked by the number of games player 1 won more than the hub, a 2 player
+    # match is saved as a different game with the games won by each player.
+    # abandoned - True if the players quit before the match finished
+    def saveStats(self, abandoned = False):
+        settings = (self._playerCount, self._gameCount, self._skillLevel, self._minSpeed)
+        duration = utime.ticks_diff(utime.ticks_ms(), self._matchStartTime)
+        gamesWonByPlayer2 = self._gamesPlayed - self._gamesWonByPlayer1
+        if (self._playerCount == 1):
+            margin = max(self._gamesWonByPlayer1 - gamesWonByPlayer2, 0)
+            self._stats.addRecord(gamestats.GAME_AIR_HOCKEY, settings, margin, self._gamesWonByPlayer1, duration, self._runtime.frameStats, abandoned)
+        else:
+            self._stats.addRecord(gamestats.GAME_AIR_HOCKEY_2P, settings, self._gamesWonByPlayer1, gamesWonByPlayer2, duration, self._runtime.frameStats, abandoned)
+        self._stats.flush()
 
     # display the end game message and exit the program.
     # userInitiatedExit - True, if the game finished due to user initiated exit. False if the match
     # has finished due to all players have completed all the games.
     def endGame(self, userInitiatedExit = False):
-        hub.display.clear()
+        self._hal.clear()
         if (userInitiatedExit):
+            # keep the games played so far
+            if (self._gamesPlayed > 0):
+                self.saveStats(True)
             sys.exit(0)
-        # players have completed the match, show the final result
+        # players have completed the match, save and show the final result
+        self.saveStats()
         if (self._gamesWonByPlayer1 > (self._gameCount - self._gamesWonByPlayer1)):
             # player 1 won
             self.showMatchWinner(1)
         else:
             # player 2 won
             self.showMatchWinner(2)
+        # show the best win margin against the hub
+        if (self._playerCount == 1):
+            self._hal.write('HI ' + str(self._stats.getBestScore(gamestats.GAME_AIR_HOCKEY)))
+            utime.sleep_ms(3000)
         sys.exit(0)
 
     # display title animation
     def displayTitleAnimation(self):
+        hal = self._hal
+        titleImages = [hal.loadImage("00900:09090:90009:00000:00000"), hal.loadImage("90009:99999:90009:00000:00000")]
         # show title animation
-        hub.display.show([hub.Image("00900:09090:90009:00000:00000"), hub.Image("90009:99999:90009:00000:00000")], fade = 2, delay = 1000)
+        hal.showAnimation(titleImages, 1000, fade = 2)
         utime.sleep_ms(1000)
-        hub.display.clear()
+        hal.clear()
         # show the bounce sequence
-        hub.display.show([
-        hub.Image("00000:00000:97009:00000:00000:"),
-        hub.Image("00000:00000:90709:00000:00000:"),
-        hub.Image("00000:00000:90079:00000:00000:"),
-        hub.Image("00000:00000:00009:90070:00000:"),
-        hub.Image("00000:00000:00009:90000:00700:"),
-        hub.Image("00000:00000:00009:97000:00000:"),
-        hub.Image("00000:00000:00709:90000:00000:"),
-        hub.Image("00000:00079:00000:90000:00000:"),
-        hub.Image("00000:00709:90000:00000:00000:"),
-        hub.Image("00000:97009:00000:00000:00000:"),
-        hub.Image("00000:90709:00000:00000:00000:"),
-        hub.Image("00000:90079:00000:00000:00000:"),
-        hub.Image("00000:00009:00700:90000:00000:"),
-        hub.Image("00000:00009:00000:97000:00000:"),
-        hub.Image("00000:00000:00000:90709:00000:"),
-        hub.Image("00000:00000:00000:90079:00000:")
-        ], delay = 300)
+        hal.showAnimation([
+        hal.loadImage("00000:00000:97009:00000:00000:"),
+        hal.loadImage("00000:00000:90709:00000:00000:"),
+        hal.loadImage("00000:00000:90079:00000:00000:"),
+        hal.loadImage("00000:00000:00009:90070:00000:"),
+        hal.loadImage("00000:00000:00009:90000:00700:"),
+        hal.loadImage("00000:00000:00009:97000:00000:"),
+        hal.loadImage("00000:00000:00709:90000:00000:"),
+        hal.loadImage("00000:00079:00000:90000:00000:"),
+        hal.loadImage("00000:00709:90000:00000:00000:"),
+        hal.loadImage("00000:97009:00000:00000:00000:"),
+        hal.loadImage("00000:90709:00000:00000:00000:"),
+        hal.loadImage("00000:90079:00000:00000:00000:"),
+        hal.loadImage("00000:00009:00700:90000:00000:"),
+        hal.loadImage("00000:00009:00000:97000:00000:"),
+        hal.loadImage("00000:00000:00000:90709:00000:"),
+        hal.loadImage("00000:00000:00000:90079:00000:")
+        ], 300)
         # show title animation
-        hub.display.show([hub.Image("00900:09090:90009:00000:00000"), hub.Image("90009:99999:90009:00000:00000")], fade = 2, delay = 1000)
+        hal.showAnimation(titleImages, 1000, fade = 2)
         utime.sleep_ms(1000)
-        hub.display.clear()
+        hal.clear()
 
     # select the number of players in the game
     def selectPlayers(self):
+        input = self._runtime.input
         # set the number of players depending on the position of the player 1 wheel
         while (True):
-            if (hub.button.left.is_pressed()):
+            self._runtime.pollInput()
+            if (input.left):
                 self.endGame(True)
                 return
-            pos = self._player1.getStrikerPos()
+            pos = self._player1.getStrikerPos(input)
             if (pos[1] < 2):
-                hub.display.show(self._img1Player)
+                self._hal.showImage(self._img1Player)
             else:
-                hub.display.show(self._img2Player)
+                self._hal.showImage(self._img2Player)
             # if the right key button is pressed, return the number of players
-            if (hub.button.right.is_pressed()):
-                hub.sound.beep(1000, 200)
+            if (input.right):
+                self._hal.beep(1000, 200)
                 return [2, 1][pos[1] < 2]
 
     # set the number of games to play
     def setGameCount(self):
+        input = self._runtime.input
         # set the number of games to play by turning the player 1 wheel
         while (True):
-            if (hub.button.left.is_pressed()):
+            self._runtime.pollInput()
+            if (input.left):
                 self.endGame(True)
                 return
-            pos = self._player1.getStrikerPos()
-            hub.display.show(self._gameImages[pos[1]])
+            pos = self._player1.getStrikerPos(input)
+            self._hal.showImage(self._gameImages[pos[1]])
             # if the right key button is pressed, return the number of players
-            if (hub.button.right.is_pressed()):
-                hub.sound.beep(1000, 200)
+            if (input.right):
+                self._hal.beep(1000, 200)
                 return pos[1] * 2 + 1
 
     # start a game
@@ -404,13 +419,17 @@ class AirHockey:
         utime.sleep_ms(1000)
         self._gameCount = self.setGameCount()
         utime.sleep_ms(1000)
+        # the player 2 motor is not used when playing against the brick
+        self._runtime.setMotorActive(1, self._playerCount == 2)
 
         # no game has been played
         self._gamesWonByPlayer1 = 0
+        self._matchStartTime = utime.ticks_ms()
+        self._runtime.frameStats.reset()
         lastWinner = -1
         while (self._gamesPlayed < self._gameCount):
             # check if the exit button has been pressed
-            if (hub.button.left.is_pressed() or lastWinner == 0):
+            if (self._hal.isPressed(gameruntime.BUTTON_LEFT)):
                 self.endGame(True)
                 return
             # if the last winner hasn't been defined or the last winner is player 2,
@@ -421,6 +440,10 @@ class AirHockey:
             elif (lastWinner == 1):
                 self.resetGame(False)
                 lastWinner = self.startGame()
+            # the game was quit before it finished, it is not counted
+            if (lastWinner == 0):
+                self.endGame(True)
+                return
             # check who won the last game
             if (lastWinner == 1):
                 self._gamesWonByPlayer1 = self._gamesWonByPlayer1 + 1
@@ -434,102 +457,109 @@ class AirHockey:
     # 1 - if player 1 won the game
     # 2 - if player 2 won the game
     def startGame(self):
-        while (True):
-            # quit if the left button is pressed
-            if (hub.button.left.is_pressed()):
-                hub.display.clear()
-                return 0
-
-            # move the puck
-            self._puck.move()
-
-            # get the position for striker 1, 2 and the puck
-            s1pos = self._player1.getStrikerPos()
-            # use pre-computed position
-            if (self._playerCount == 1):
-                s2pos = (0, self._computerY)
-            else:
-                s2pos = self._player2.getStrikerPos()
-
-            # check if the puck is attached to the striker, if so, need to update the y position of the puck
-            puckStriker = self._puck.getStriker()
+        winner = self._runtime.run(self)
+        if (winner == 0):
+            self._hal.clear()
+        else:
+            self.showWinner(winner)
+        return winner
+
+    # Play one frame of the game, called by the runtime. Returns None while the game is
+    # being played, otherwise the result returned by startGame.
+    # input - the InputState of the current frame
+    def update(self, input):
+        # quit if the left button is pressed
+        if (input.left):
+            return 0
+
+        # move the puck
+        self._puck.move()
+
+        # get the position for striker 1, 2 and the puck
+        s1pos = self._player1.getStrikerPos(input)
+        # use pre-computed position
+        if (self._playerCount == 1):
+            s2pos = (0, self._computerY)
+        else:
+            s2pos = self._player2.getStrikerPos(input)
+        # keep the positions for draw()
+        self._s1pos = s1pos
+        self._s2pos = s2pos
+
+        # check if the puck is attached to the striker, if so, need to update the y position of the puck
+        puckStriker = self._puck.getStriker()
+        if (puckStriker == 1):
+            self._puck.setStatus(self._puck.getX(), s1pos[1], 0, 1)
+        elif (puckStriker == 2 and self._playerCount == 2):
+            self._puck.setStatus(self._puck.getX(), s2pos[1], 0, 2)
+
+        # if the puck is attached and RB is pressed, hit the puck
+        # return (self._x, self._y, self._dir, self._striker)
+        if (input.right):
             if (puckStriker == 1):
-                self._puck.setStatus(self._puck.getX(), s1pos[1], 0, 1)
-            elif (puckStriker == 2 and self._playerCount == 2):
-                self._puck.setStatus(self._puck.getX(), s2pos[1], 0, 2)
-
-            # if the puck is attached and RB is pressed, hit the puck
-            # return (self._x, self._y, self._dir, self._striker)
-            if (hub.button.right.is_pressed() == True):
-                if (puckStriker == 1):
+                self._puck.setStatus(self._puck.getX(), self._puck.getY(), self.p1strike(), 0)
+            elif (puckStriker == 2):
+                self._puck.setStatus(self._puck.getX(), self._puck.getY(), self.p2strike(), 0)
+            # make a sound when someone hits the puck
+            if (puckStriker != 0):
+                self._hal.beep(1000, 100)
+
+        # the puck has reached the player 1 and player 1's y position doesn't matches the pucks, player1 loses
+        if (self._puck.getStriker() == 0):
+            if (self._puck.getX() == (self._tableWidth - 1)):
+                if (s1pos[1] != self._puck.getY()):
+                    return 2
+                else:
+                    # player 1 can block it, generate a random return hit
                     self._puck.setStatus(self._puck.getX(), self._puck.getY(), self.p1strike(), 0)
-                elif (puckStriker == 2):
-                    self._puck.setStatus(self._puck.getX(), self._puck.getY(), self.p2strike(), 0)
-                # make a sound when someone hits the puck
-                if (puckStriker != 0):
-                    hub.sound.beep(1000, 100)
-
-            # refresh the screen
-            puckStatus = self._puck.getStatus()
-            self.refreshScreen(s1pos, s2pos, puckStatus)
-
-            # the puck has reached the player 1 and player 1's y position doesn't matches the pucks, player1 loses
-            if (self._puck.getStriker() == 0):
-                if (self._puck.getX() == (self._tableWidth - 1)):
-                    if (s1pos[1] != self._puck.getY()):
-                        self.showWinner(2)
-                        return 2
+                    self._hal.beep(500, 100)
+                    # increase the play speed
+                    self.updatePuckSpeed()
+
+            # 2 player mode?
+            elif (self._playerCount == 2):
+                if (self._puck.getX() == 0):
+                    if (s2pos[1] != self._puck.getY()):
+                        return 1
                     else:
-                        # player 1 can block it, generate a random return hit
-                        self._puck.setStatus(self._puck.getX(), self._puck.getY(), self.p1strike(), 0)
-                        hub.sound.beep(500, 100)
-                        # increase the play speed
-                        self.updatePuckSpeed()
-
-                # 2 player mode?
-                elif (self._playerCount == 2):
-                    if (self._puck.getX() == 0):
-                        if (s2pos[1] != self._puck.getY()):
-                            self.showWinner(1)
-                            return 1
-                        else:
-                            # player 2 can block it, generate a random return hit
-                            self._puck.setStatus(self._puck.getX(), self._puck.getY(), self.p2strike(), 0)
-                            hub.sound.beep(700, 100)
+                        # player 2 can block it, generate a random return hit
+                        self._puck.setStatus(self._puck.getX(), self._puck.getY(), self.p2strike(), 0)
+                        self._hal.beep(700, 100)
 
-                # single player mode - player 2 is the computer player
-                # depending on the skill level, move p2 striker to block it
-                else:
-                    # make the computer to move to a position where it can block the puck when the puck gets to x position of 0.
-                    if (self._puck.getX() == 1):
-                        r = urandom.randint(0, 100)
-                        log('skill: ' + str(r))
-                        if (r <= self._skillLevel):
-                            # computer player must be able to block the puck
-                            self._computerY = self.calculatePuckNextY()
-                            log('computer y: ' + str(self._computerY))
-                        else:
-                            # computer player would not block the puck
-                            nextPos = self.calculatePuckNextY()
-                            if (nextPos == 0):
-                                self._computerY = 1
-                            else:
-                                self._computerY = nextPos - 1
-                    # make a decision to see if computer can block or not
-                    elif (self._puck.getX() == 0):
-                        if (s2pos[1] != self._puck.getY()):
-                            self.showWinner(1)
-                            return 1
+            # single player mode - player 2 is the computer player
+            # depending on the skill level, move p2 striker to block it
+            else:
+                # make the computer to move to a position where it can block the puck when the puck gets to x position of 0.
+                if (self._puck.getX() == 1):
+                    r = urandom.randint(0, 100)
+                    log('skill: ' + str(r))
+                    if (r <= self._skillLevel):
+                        # computer player must be able to block the puck
+                        self._computerY = self.calculatePuckNextY()
+                        log('computer y: ' + str(self._computerY))
+                    else:
+                        # computer player would not block the puck
+                        nextPos = self.calculatePuckNextY()
+                        if (nextPos == 0):
+                            self._computerY = 1
                         else:
-                            # player 2 can block it, generate a random return hit
-                            self._puck.setStatus(self._puck.getX(), self._puck.getY(), self.p2strike(), 0)
-                            hub.sound.beep(700, 100)
+                            self._computerY = nextPos - 1
+                # make a decision to see if computer can block or not
+                elif (self._puck.getX() == 0):
+                    if (s2pos[1] != self._puck.getY()):
+                        return 1
+                    else:
+                        # player 2 can block it, generate a random return hit
+                        self._puck.setStatus(self._puck.getX(), self._puck.getY(), self.p2strike(), 0)
+                        self._hal.beep(700, 100)
 
-            # add a delay based on the current speed
-            utime.sleep_ms(self._currentSpeed)
-            log('current speed: ' + str(self._currentSpeed))
+        # the next frame is played based on the current speed
+        self.frameMs = self._currentSpeed
+        log('current speed: ' + str(self._currentSpeed))
+        return None
 
 
-# create a new game
-game = AirHockey(tableWidth = 20, puckBrightness = 8, strikerBrightness = 9, playerCount = 1, constSpeed = False, minSpeed = 300, maxSpeed = 100, speedIncrement = 25, skillLevel = 90, gameCount = 3)
-game.run()
\ No newline at end of file
+# create a new game, unless benchgames.py is only measuring this file
+if (not ("benchgames" in sys.modules)):
+    game = AirHockey(tableWidth = 20, puckBrightness = 8, strikerBrightness = 9, playerCount = 1, constSpeed = False, minSpeed = 300, maxSpeed = 100, speedIncrement = 25, skillLevel = 90, gameCount = 3)
+    game.run()
\ No newline at end of file
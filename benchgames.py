@@ -0,0 +1,119 @@
+# --------------------------------------------------------------------------------
+#
+# benchgames.py for LEGO Mindstorms 51515
+#
+# Measures the time to import each game and the heap it uses, then the time to create the
+# game and the heap used by the game object (its runtime, renderer, input state, images and
+# score store). The games are created with a HAL that does nothing, so the motors don't move.
+# Copy this file, the games, gameruntime.py and gamestats.py onto the hub and run it. The
+# games don't start when they see "benchgames" in sys.modules, so they are not started here.
+#
+# By Chun Cheung Yim (cheungslegocreation@gmail.com)
+#
+# https://www.youtube.com/channel/UCbp55xmp7t4dhIjeSHD8FwA
+#
+# This work is licensed to you under the terms defined in Creative Commons Attribution-NonCommercial-NoDerivs (CC BY-NC-ND).
+# For more details on what this means, refer to
+#
+# https://creativecommons.org/licenses/by-nc-nd/4.0/
+#
+# --------------------------------------------------------------------------------
+
+import gc
+import sys
+import utime
+
+
+# let the games know they are only being measured, this file may be run under another
+# module name (e.g. from a program slot) so the flag is added under a fixed name
+sys.modules["benchgames"] = sys.modules.get(__name__, True)
+
+# the shared modules are measured first, so the numbers of a game only include the game
+MODULES = ("gamestats", "gameruntime")
+# the game modules and how to create each game with a HAL
+GAMES = (("AirHockey", lambda module, hal: module.AirHockey(hal = hal)),
+         ("snake", lambda module, hal: module.Snake(0.3, hal)))
+
+
+# a HAL that does nothing, used to create the games without the hub hardware
+class StubHal:
+    def setPixel(self, x, y, brightness):
+        pass
+
+    def clear(self):
+        pass
+
+    # keep the images the same size as MindstormsHal does
+    def loadImage(self, image):
+        import gameruntime
+        if (":" in image):
+            return gameruntime.parseImage(image)
+        return image
+
+    def showImage(self, image, brightness = 9):
+        pass
+
+    def showAnimation(self, images, delay, fade = 0):
+        pass
+
+    def write(self, text):
+        pass
+
+    def isPressed(self, button):
+        return False
+
+    def wasPressed(self, button):
+        return False
+
+    def setupMotor(self, port):
+        pass
+
+    def getMotorAngle(self, port, wrap = True):
+        return 0
+
+    def zeroMotor(self, port):
+        pass
+
+    def beep(self, frequency, ms = None, volume = None):
+        pass
+
+    def setVolume(self, volume):
+        pass
+
+    def playSound(self, name, volume = None):
+        pass
+
+    def setLed(self, colour):
+        pass
+
+    def sleepMs(self, ms):
+        pass
+
+
+# run a function, returns (its result, time in ms, heap still used after it in bytes)
+def measure(function):
+    gc.collect()
+    heapBefore = gc.mem_alloc()
+    start = utime.ticks_us()
+    result = function()
+    duration = utime.ticks_diff(utime.ticks_us(), start)
+    gc.collect()
+    return (result, duration / 1000, gc.mem_alloc() - heapBefore)
+
+
+def main():
+    for name in MODULES:
+        (module, ms, heap) = measure(lambda: __import__(name))
+        print(name + " - import: " + str(ms) + " ms, heap: " + str(heap) + " bytes")
+    for (name, create) in GAMES:
+        (module, ms, heap) = measure(lambda: __import__(name))
+        print(name + " - import: " + str(ms) + " ms, heap: " + str(heap) + " bytes")
+        (game, ms, heap) = measure(lambda: create(module, StubHal()))
+        print(name + " - create: " + str(ms) + " ms, heap: " + str(heap) + " bytes")
+        # unload the game so the next one is measured on its own
+        game = None
+        module = None
+        del sys.modules[name]
+
+
+main()
@@ -0,0 +1,420 @@
+# --------------------------------------------------------------------------------
+#
+# gameruntime.py for LEGO Mindstorms 51515
+#
+# The game loop, input and rendering shared by the games. Copy this file (and
+# gamestats.py) onto the hub next to the game so it can be imported.
+#
+# By Chun Cheung Yim (cheungslegocreation@gmail.com)
+#
+# https://www.youtube.com/channel/UCbp55xmp7t4dhIjeSHD8FwA
+#
+# This work is licensed to you under the terms defined in Creative Commons Attribution-NonCommercial-NoDerivs (CC BY-NC-ND).
+# For more details on what this means, refer to
+#
+# https://creativecommons.org/licenses/by-nc-nd/4.0/
+#
+# --------------------------------------------------------------------------------
+#
+# A game is a Scene. Runtime.run(scene) runs one frame after another until the scene's
+# update() returns a result:
+#
+#   1. input  - the buttons and motors are read into the preallocated InputState
+#   2. update - scene.update(input) moves the game on by one frame
+#   3. render - scene.draw(renderer) draws the frame, only the changed pixels are sent
+#               to the light matrix
+#
+# The frames are started every scene.frameMs ms, the time spent on a frame is taken off
+# the delay instead of being added to it. The hardware is reached through a HAL, HubHal
+# for the low level hub module and MindstormsHal for the mindstorms module, so the same
+# game runs on either. Brightness is always 0 to 9 and sound frequencies are in Hz.
+#
+# --------------------------------------------------------------------------------
+
+import math
+import utime
+import gamestats
+
+
+BUTTON_LEFT = 0
+BUTTON_RIGHT = 1
+
+# the light matrix size
+WIDTH = 5
+HEIGHT = 5
+
+# brightness 0 to 9 in the 0 to 100 range used by the mindstorms module
+MINDSTORMS_BRIGHTNESS = (0, 10, 20, 30, 40, 50, 60, 70, 80, 100)
+
+# the colour index of the status light used by the hub module
+HUB_LED_COLOURS = {"black": 0, "pink": 1, "violet": 2, "blue": 3, "azure": 4, "cyan": 5, "green": 6, "yellow": 7, "orange": 8, "red": 9, "white": 10}
+
+
+# parse an image in "13131:31313:13131:31313:13131" format into a bytearray of brightness
+def parseImage(rows):
+    pixels = bytearray(WIDTH * HEIGHT)
+    i = 0
+    for c in rows:
+        if (c >= "0" and c <= "9" and i < len(pixels)):
+            pixels[i] = ord(c) - ord("0")
+            i = i + 1
+    return pixels
+
+
+# return the signed angle of a motor, the value is in [-179..180]
+def wrapAngle(angle):
+    angle = angle % 360
+    if (angle > 180):
+        angle = angle - 360
+    return angle
+
+
+# map a motor angle onto a level. limits must be in descending order, the level is the
+# number of limits the angle is less than or equal to, e.g. with limits (45, 15, -16, -46)
+# an angle of 90 is level 0 and an angle of -90 is level 4
+def getMotorLevel(angle, limits):
+    level = 0
+    for limit in limits:
+        if (angle > limit):
+            break
+        level = level + 1
+    return level
+
+
+# HAL for the low level hub module
+class HubHal:
+    def __init__(self):
+        import hub
+        self._hub = hub
+        self._buttons = (hub.button.left, hub.button.right)
+        self._motors = {}
+        # the hub wide volume, assumed to be 100 (as in MindstormsHal) until setVolume is called
+        self._volume = 100
+
+    # the light matrix
+    def setPixel(self, x, y, brightness):
+        self._hub.display.pixel(x, y, brightness)
+
+    def clear(self):
+        self._hub.display.clear()
+
+    # image - a built-in image name (e.g. "SKULL") or an image in "09990:07770:..." format
+    # returns the image in the format taken by showImage and showAnimation
+    def loadImage(self, image):
+        if (":" in image):
+            return self._hub.Image(image)
+        return getattr(self._hub.Image, image)
+
+    # show an image returned by loadImage, the brightness is only supported by MindstormsHal
+    def showImage(self, image, brightness = 9):
+        self._hub.display.show(image)
+
+    def showAnimation(self, images, delay, fade = 0):
+        self._hub.display.show(images, fade = fade, delay = delay)
+
+    def write(self, text):
+        self._hub.display.show(str(text))
+
+    # the buttons
+    def isPressed(self, button):
+        return self._buttons[button].is_pressed()
+
+    def wasPressed(self, button):
+        return self._buttons[button].was_pressed()
+
+    # the motors, the control motor is turned back to 0 before it is used
+    def setupMotor(self, port):
+        motor = getattr(self._hub.port, port).motor
+        # set absolute position
+        motor.mode(3)
+        motor.preset(motor.get()[0])
+        motor.run_to_position(0, 20)
+        utime.sleep_ms(1000)
+        motor.preset(0)
+        # allow the motor to flow when stop
+        motor.float()
+        self._motors[port] = motor
+
+    # wrap - True for the angle in [-179..180], False for the position read from the motor
+    def getMotorAngle(self, port, wrap = True):
+        if (wrap):
+            return wrapAngle(self._motors[port].get()[0])
+        return self._motors[port].get()[0]
+
+    def zeroMotor(self, port):
+        self._motors[port].preset(0)
+
+    # the sound, frequency is in Hz, if ms is None the default length is used. The volume of
+    # the hub module is hub wide, so a beep with its own volume is played to the end (like
+    # MindstormsHal does) and the volume is put back afterwards.
+    def beep(self, frequency, ms = None, volume = None):
+        if (volume == None or volume == self._volume):
+            if (ms == None):
+                self._hub.sound.beep(frequency)
+            else:
+                self._hub.sound.beep(frequency, ms)
+            return
+        if (ms == None):
+            ms = 200
+        self._hub.sound.volume(volume)
+        self._hub.sound.beep(frequency, ms)
+        utime.sleep_ms(ms)
+        self._hub.sound.volume(self._volume)
+
+    def setVolume(self, volume):
+        self._volume = volume
+        self._hub.sound.volume(volume)
+
+    # the hub module cannot play the app's sounds, play a falling beep instead
+    def playSound(self, name, volume = None):
+        if (volume != None):
+            self._hub.sound.volume(volume)
+        self._hub.sound.beep(400, 300)
+        utime.sleep_ms(300)
+        self._hub.sound.beep(200, 300)
+        utime.sleep_ms(300)
+        self._hub.sound.volume(self._volume)
+
+    # the status light, colour None turns it off
+    def setLed(self, colour):
+        self._hub.led(HUB_LED_COLOURS[colour or "black"])
+
+    def sleepMs(self, ms):
+        utime.sleep_ms(ms)
+
+
+# HAL for the mindstorms module used by the Mindstorms app
+class MindstormsHal:
+    def __init__(self):
+        from mindstorms import MSHub, Motor
+        self._motorClass = Motor
+        self._hub = MSHub()
+        self._buttons = (self._hub.left_button, self._hub.right_button)
+        self._motors = {}
+        self._volume = 100
+
+    # the light matrix
+    def setPixel(self, x, y, brightness):
+        self._hub.light_matrix.set_pixel(x, y, MINDSTORMS_BRIGHTNESS[brightness])
+
+    def clear(self):
+        self._hub.light_matrix.off()
+
+    # image - a built-in image name (e.g. "SKULL") or an image in "09990:07770:..." format
+    # returns the image in the format taken by showImage and showAnimation
+    def loadImage(self, image):
+        if (":" in image):
+            return parseImage(image)
+        return image
+
+    def showImage(self, image, brightness = 9):
+        if (isinstance(image, str)):
+            self._hub.light_matrix.show_image(image, MINDSTORMS_BRIGHTNESS[brightness])
+            return
+        for i in range(0, WIDTH * HEIGHT):
+            self._hub.light_matrix.set_pixel(i % WIDTH, i // WIDTH, MINDSTORMS_BRIGHTNESS[image[i] * brightness // 9])
+
+    # fade is only supported by HubHal
+    def showAnimation(self, images, delay, fade = 0):
+        for image in images:
+            self.showImage(image)
+            utime.sleep_ms(delay)
+
+    def write(self, text):
+        self._hub.light_matrix.write(str(text))
+
+    # the buttons
+    def isPressed(self, button):
+        return self._buttons[button].is_pressed()
+
+    def wasPressed(self, button):
+        return self._buttons[button].was_pressed()
+
+    # the motors, the current position of the control motor is used as 0
+    def setupMotor(self, port):
+        motor = self._motorClass(port)
+        motor.set_degrees_counted(0)
+        self._motors[port] = motor
+
+    # wrap - True for the angle in [-179..180], False for the degrees counted since the last zero
+    def getMotorAngle(self, port, wrap = True):
+        if (wrap):
+            return wrapAngle(self._motors[port].get_degrees_counted())
+        return self._motors[port].get_degrees_counted()
+
+    def zeroMotor(self, port):
+        self._motors[port].set_degrees_counted(0)
+
+    # the sound, frequency is in Hz and is played as the nearest note
+    def beep(self, frequency, ms = None, volume = None):
+        note = int(round(69 + 12 * math.log(frequency / 440) / math.log(2)))
+        note = min(max(note, 44), 123)
+        if (ms == None):
+            ms = 200
+        if (volume == None):
+            volume = self._volume
+        self._hub.speaker.beep(note, ms / 1000, volume)
+
+    def setVolume(self, volume):
+        self._volume = volume
+
+    def playSound(self, name, volume = None):
+        if (volume == None):
+            volume = self._volume
+        self._hub.speaker.play_sound(name, volume)
+
+    # the status light, colour None turns it off
+    def setLed(self, colour):
+        if (colour == None):
+            self._hub.status_light.off()
+        else:
+            self._hub.status_light.on(colour)
+
+    def sleepMs(self, ms):
+        utime.sleep_ms(ms)
+
+
+# the state of the buttons and motors, it is allocated once and filled in every frame
+class InputState:
+    def __init__(self, motorCount):
+        self.left = False            # the left button is held down
+        self.right = False            # the right button is held down
+        self.leftPressed = False        # the left button was pressed since the last frame
+        self.rightPressed = False        # the right button was pressed since the last frame
+        self.angles = [0] * motorCount    # the angle of each motor, see Runtime
+
+
+# a frame buffer that only sends the pixels changed since the last frame to the display
+class Renderer:
+    def __init__(self, hal):
+        self._hal = hal
+        self._front = bytearray(WIDTH * HEIGHT)    # what is on the display
+        self._back = bytearray(WIDTH * HEIGHT)    # the frame being drawn
+        self._blank = bytearray(WIDTH * HEIGHT)
+        self.invalidate()
+
+    # call after drawing on the display without the renderer, the next frame is sent in full
+    def invalidate(self):
+        for i in range(0, WIDTH * HEIGHT):
+            self._front[i] = 0xFF
+
+    # start a new frame
+    # background - an image returned by parseImage, or None for a blank frame
+    def clear(self, background = None):
+        self._back[:] = background or self._blank
+
+    def setPixel(self, x, y, brightness):
+        if (x >= 0 and x < WIDTH and y >= 0 and y < HEIGHT):
+            self._back[y * WIDTH + x] = brightness
+
+    # send the changed pixels to the display
+    def present(self):
+        front = self._front
+        back = self._back
+        for i in range(0, WIDTH * HEIGHT):
+            if (back[i] != front[i]):
+                self._hal.setPixel(i % WIDTH, i // WIDTH, back[i])
+                front[i] = back[i]
+
+
+# the base class of a game run by Runtime
+class Scene:
+    # the time between the start of two frames in ms, it can be changed by update()
+    frameMs = 100
+
+    # move the game on by one frame, return None to carry on or a result to stop the run
+    def update(self, input):
+        return None
+
+    # draw the frame on the renderer, the renderer has not been cleared
+    def draw(self, renderer):
+        pass
+
+
+# runs a scene, one frame at a time
+class Runtime:
+    # hal - the HubHal or MindstormsHal
+    # motorPorts - the ports of the control motors read into InputState.angles
+    # relativeMotors - True to zero the motors after every read so the angles are the
+    # degrees turned since the last frame (not wrapped, so a turn of more than half a
+    # rotation can be told apart), False for the angle from the starting position in [-179..180]
+    def __init__(self, hal, motorPorts = (), relativeMotors = False):
+        self._hal = hal
+        self._motorPorts = tuple(motorPorts)
+        self._motorActive = [True] * len(self._motorPorts)
+        self._relativeMotors = relativeMotors
+        for port in self._motorPorts:
+            hal.setupMotor(port)
+        self.input = InputState(len(self._motorPorts))
+        self.renderer = Renderer(hal)
+        self.frameStats = gamestats.FrameStats()
+
+    # stop or start reading a motor, e.g. a player that is not playing
+    def setMotorActive(self, index, active):
+        self._motorActive[index] = active
+
+    # read the buttons and motors into self.input
+    def pollInput(self):
+        hal = self._hal
+        input = self.input
+        input.left = hal.isPressed(BUTTON_LEFT)
+        input.right = hal.isPressed(BUTTON_RIGHT)
+        input.leftPressed = hal.wasPressed(BUTTON_LEFT)
+        input.rightPressed = hal.wasPressed(BUTTON_RIGHT)
+        for i in range(0, len(self._motorPorts)):
+            if (self._motorActive[i]):
+                input.angles[i] = hal.getMotorAngle(self._motorPorts[i], not self._relativeMotors)
+                if (self._relativeMotors):
+                    hal.zeroMotor(self._motorPorts[i])
+
+    # run the scene until its update() returns a result, the result is returned
+    # showFirstFrame - True to draw the scene and wait for one frame before the first update()
+    def run(self, scene, showFirstFrame = False):
+        stats = self.frameStats
+        renderer = self.renderer
+        renderer.invalidate()
+        nextFrame = utime.ticks_ms()
+        if (showFirstFrame):
+            scene.draw(renderer)
+            renderer.present()
+            nextFrame = utime.ticks_add(nextFrame, scene.frameMs)
+            utime.sleep_ms(max(utime.ticks_diff(nextFrame, utime.ticks_ms()), 0))
+        while (True):
+            stats.begin()
+            self.pollInput()
+            stats.mark(gamestats.PHASE_INPUT)
+            result = scene.update(self.input)
+            stats.mark(gamestats.PHASE_UPDATE)
+            scene.draw(renderer)
+            renderer.present()
+            stats.mark(gamestats.PHASE_RENDER)
+            stats.end()
+            if (result != None):
+                return result
+            # wait for the start of the next frame, if the frame is late don't try to catch up
+            nextFrame = utime.ticks_add(nextFrame, scene.frameMs)
+            delay = utime.ticks_diff(nextFrame, utime.ticks_ms())
+            if (delay > 0):
+                utime.sleep_ms(delay)
+            else:
+                nextFrame = utime.ticks_ms()
+
+
+# flash the status light
+# colour - the colour name, e.g. "green"
+def flashLed(hal, colour, times = 3, delay = 500):
+    for x in range(0, times):
+        hal.setLed(colour)
+        hal.sleepMs(delay)
+        hal.setLed(None)
+        hal.sleepMs(delay)
+
+
+# show the end of game image and sound, then the score
+# image - an image returned by hal.loadImage
+def showGameOver(hal, image, sound, score):
+    hal.showImage(image)
+    hal.playSound(sound, 100)
+    hal.clear()
+    hal.write(score)
+    hal.sleepMs(1000)
@@ -0,0 +1,417 @@
+# --------------------------------------------------------------------------------
+#
+# gamestats.py for LEGO Mindstorms 51515
+#
+# High score and match statistics store shared by the games. Copy this file onto the
+# hub next to the game so it can be imported.
+#
+# By Chun Cheung Yim (cheungslegocreation@gmail.com)
+#
+# https://www.youtube.com/channel/UCbp55xmp7t4dhIjeSHD8FwA
+#
+# This work is licensed to you under the terms defined in Creative Commons Attribution-NonCommercial-NoDerivs (CC BY-NC-ND).
+# For more details on what this means, refer to
+#
+# https://creativecommons.org/licenses/by-nc-nd/4.0/
+#
+# --------------------------------------------------------------------------------
+#
+# The statistics are kept in an append-only log of fixed-size records. Records are queued
+# in memory while a game is running and only written to flash when flush() is called at
+# the end of the game, so no file I/O happens while a frame is being drawn. Once the log
+# grows past a limit it is compacted: the best scores of every game and the most recent
+# records are kept, the other records of a game are added into one summary record so the
+# totals of the whole history are not lost.
+#
+# Record layout (little endian, RECORD_SIZE bytes):
+#   magic, version, game, flags                 - 4 x uint8
+#   setting1, setting2, setting3, setting4      - 4 x uint16, game specific settings
+#   score, score2                               - 2 x uint16, score2 is game specific
+#   timestamp                                   - uint32, seconds from the hub clock
+#   duration                                    - uint32, length of the game in ms
+#   frames, inputMs, updateMs, renderMs         - 4 x uint32, frame stats per phase
+#   maxFrameMs, reserved                        - 2 x uint16
+#
+# A game record with FLAG_ABANDONED set is a game the player quit, it is not ranked.
+#
+# Summary record layout (flags has FLAG_SUMMARY set, also RECORD_SIZE bytes):
+#   magic, version, game, flags                 - 4 x uint8
+#   games, scoreSum, score2Sum                  - 3 x uint32, number of games (abandoned ones included)
+#                                                 and score totals of the finished games
+#   timestamp                                   - uint32, of the latest game in the summary
+#   durationSum                                 - uint32, total length of the finished games in ms
+#   frames, inputMs, updateMs, renderMs         - 4 x uint32, frame stats totals per phase
+#   maxFrameMs, abandoned                       - 2 x uint16, abandoned is the number of abandoned games
+#
+# --------------------------------------------------------------------------------
+
+try:
+    import ustruct as struct
+except ImportError:
+    import struct
+try:
+    import uos as os
+except ImportError:
+    import os
+try:
+    import utime
+except ImportError:
+    # running under CPython (e.g. querystats.py), the frame timers are not used there
+    utime = None
+
+
+RECORD_FORMAT = "<4B6H6I2H"
+SUMMARY_FORMAT = "<4B9I2H"
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+RECORD_MAGIC = 0xA5
+RECORD_VERSION = 1
+
+# the bits of the flags field
+FLAG_SUMMARY = 0x01
+FLAG_ABANDONED = 0x02
+
+# the games known to the store
+GAME_AIR_HOCKEY = 1        # 1 player matches against the hub
+GAME_SNAKE = 2
+GAME_AIR_HOCKEY_2P = 3        # 2 player matches
+GAME_NAMES = {GAME_AIR_HOCKEY: "AirHockey", GAME_SNAKE: "Snake", GAME_AIR_HOCKEY_2P: "AirHockey2P"}
+
+# the phases of a frame measured by FrameStats
+PHASE_INPUT = 0
+PHASE_UPDATE = 1
+PHASE_RENDER = 2
+
+# the position of each field in an unpacked record
+FIELD_GAME = 2
+FIELD_FLAGS = 3
+FIELD_SETTINGS = 4
+FIELD_SCORE = 8
+FIELD_SCORE2 = 9
+FIELD_TIMESTAMP = 10
+FIELD_DURATION = 11
+FIELD_FRAMES = 12
+FIELD_INPUT_MS = 13
+FIELD_UPDATE_MS = 14
+FIELD_RENDER_MS = 15
+FIELD_MAX_FRAME_MS = 16
+
+# the position of each field in an unpacked summary record
+SUMMARY_GAMES = 4
+SUMMARY_SCORE = 5
+SUMMARY_SCORE2 = 6
+SUMMARY_TIMESTAMP = 7
+SUMMARY_DURATION = 8
+SUMMARY_FRAMES = 9
+SUMMARY_INPUT_MS = 10
+SUMMARY_UPDATE_MS = 11
+SUMMARY_RENDER_MS = 12
+SUMMARY_MAX_FRAME_MS = 13
+SUMMARY_ABANDONED = 14
+
+UINT16_MAX = 0xFFFF
+UINT32_MAX = 0xFFFFFFFF
+
+
+# clamp a value so it fits into an unsigned field of the record
+def clamp(value, maxValue):
+    value = int(value)
+    if (value < 0):
+        return 0
+    if (value > maxValue):
+        return maxValue
+    return value
+
+
+# pack a record, the arguments are the same as ScoreStore.addRecord
+def packRecord(game, settings, score, score2, timestamp, duration, frameStats, flags = 0):
+    s = (tuple(settings) + (0, 0, 0, 0))[:4]
+    return struct.pack(RECORD_FORMAT, RECORD_MAGIC, RECORD_VERSION, game, flags,
+        clamp(s[0], UINT16_MAX), clamp(s[1], UINT16_MAX), clamp(s[2], UINT16_MAX), clamp(s[3], UINT16_MAX),
+        clamp(score, UINT16_MAX), clamp(score2, UINT16_MAX),
+        clamp(timestamp, UINT32_MAX), clamp(duration, UINT32_MAX),
+        clamp(frameStats[0], UINT32_MAX), clamp(frameStats[1], UINT32_MAX),
+        clamp(frameStats[2], UINT32_MAX), clamp(frameStats[3], UINT32_MAX),
+        clamp(frameStats[4], UINT16_MAX), 0)
+
+
+# return True if an unpacked record is a summary record
+def isSummary(record):
+    return (record[FIELD_FLAGS] & FLAG_SUMMARY) != 0
+
+
+# return True if an unpacked record is a game the player quit
+def isAbandoned(record):
+    return (record[FIELD_FLAGS] & (FLAG_SUMMARY | FLAG_ABANDONED)) == FLAG_ABANDONED
+
+
+# return True if an unpacked record is a finished game that can be ranked
+def isRanked(record):
+    return (record[FIELD_FLAGS] & (FLAG_SUMMARY | FLAG_ABANDONED)) == 0
+
+
+# add an unpacked record (a game or a summary) into the totals of a summary. An abandoned
+# game is counted in games, abandoned and the frame stats, but not in the score and duration
+# totals, so those can be averaged over games - abandoned.
+# summary - a list of [games, scoreSum, score2Sum, timestamp, durationSum, frames, inputMs,
+# updateMs, renderMs, maxFrameMs, abandoned], the same order as the fields of a summary record
+def addToSummary(summary, record):
+    if (isSummary(record)):
+        values = record[SUMMARY_GAMES:SUMMARY_ABANDONED + 1]
+    elif (isAbandoned(record)):
+        values = (1, 0, 0, record[FIELD_TIMESTAMP], 0,
+            record[FIELD_FRAMES], record[FIELD_INPUT_MS], record[FIELD_UPDATE_MS], record[FIELD_RENDER_MS], record[FIELD_MAX_FRAME_MS], 1)
+    else:
+        values = (1, record[FIELD_SCORE], record[FIELD_SCORE2], record[FIELD_TIMESTAMP], record[FIELD_DURATION],
+            record[FIELD_FRAMES], record[FIELD_INPUT_MS], record[FIELD_UPDATE_MS], record[FIELD_RENDER_MS], record[FIELD_MAX_FRAME_MS], 0)
+    for i in range(0, len(summary)):
+        # the timestamp and the max frame time are not totals
+        if (i == 3 or i == 9):
+            summary[i] = max(summary[i], values[i])
+        else:
+            summary[i] = summary[i] + values[i]
+
+
+# pack a summary record
+# summary - the list of totals filled in by addToSummary
+def packSummary(game, summary):
+    values = [clamp(x, UINT32_MAX) for x in summary]
+    values[9] = clamp(summary[9], UINT16_MAX)
+    values[10] = clamp(summary[10], UINT16_MAX)
+    return struct.pack(SUMMARY_FORMAT, RECORD_MAGIC, RECORD_VERSION, game, FLAG_SUMMARY, *values)
+
+
+# return True if a file exists
+def fileExists(path):
+    try:
+        os.stat(path)
+        return True
+    except OSError:
+        return False
+
+
+# read all the records in a log file, returns a list of unpacked records (tuples), use
+# isSummary to tell the summary records apart.
+# A partially written record at the end of the file (e.g. the hub was switched off while
+# writing) and records with a bad magic number are skipped. If the log is missing because
+# the hub was switched off while it was being compacted, the compacted log is read.
+def readRecords(path):
+    records = []
+    try:
+        f = open(path, "rb")
+    except OSError:
+        try:
+            f = open(path + ".tmp", "rb")
+        except OSError:
+            return records
+    try:
+        while (True):
+            data = f.read(RECORD_SIZE)
+            if (len(data) < RECORD_SIZE):
+                break
+            if (data[0] != RECORD_MAGIC or data[1] != RECORD_VERSION):
+                continue
+            if (data[FIELD_FLAGS] & FLAG_SUMMARY):
+                records.append(struct.unpack(SUMMARY_FORMAT, data))
+            else:
+                records.append(struct.unpack(RECORD_FORMAT, data))
+    finally:
+        f.close()
+    return records
+
+
+# collects the time spent in each phase of a frame. All the counters are preallocated so
+# nothing is allocated while a frame is running.
+class FrameStats:
+    def __init__(self):
+        self._phaseMs = [0, 0, 0]
+        self.reset()
+
+    # clear all the counters
+    def reset(self):
+        self._frames = 0
+        self._phaseMs[PHASE_INPUT] = 0
+        self._phaseMs[PHASE_UPDATE] = 0
+        self._phaseMs[PHASE_RENDER] = 0
+        self._maxFrameMs = 0
+        self._frameStart = 0
+        self._lastMark = 0
+
+    # call at the start of a frame
+    def begin(self):
+        self._frameStart = utime.ticks_ms()
+        self._lastMark = self._frameStart
+
+    # add the time since the last mark (or begin) to the given phase, a phase can be
+    # marked more than once in a frame
+    def mark(self, phase):
+        now = utime.ticks_ms()
+        self._phaseMs[phase] = self._phaseMs[phase] + utime.ticks_diff(now, self._lastMark)
+        self._lastMark = now
+
+    # call at the end of a frame, before the delay of the frame
+    def end(self):
+        frameMs = utime.ticks_diff(self._lastMark, self._frameStart)
+        if (frameMs > self._maxFrameMs):
+            self._maxFrameMs = frameMs
+        self._frames = self._frames + 1
+
+    # return the stats in the order stored in a record - (frames, inputMs, updateMs, renderMs, maxFrameMs)
+    def getStats(self):
+        return (self._frames, self._phaseMs[PHASE_INPUT], self._phaseMs[PHASE_UPDATE], self._phaseMs[PHASE_RENDER], self._maxFrameMs)
+
+
+# the store of the game records
+class ScoreStore:
+    # path - the log file on the hub
+    # topCount - number of best scores kept for each game
+    # compactAt - compact the log once it holds more than this number of records
+    # keepRecent - number of most recent records kept when compacting
+    def __init__(self, path = "gamestats.log", topCount = 5, compactAt = 200, keepRecent = 50):
+        self._path = path
+        self._topCount = topCount
+        self._compactAt = compactAt
+        self._keepRecent = keepRecent
+        self._pending = []
+        # the top scores index, it is only loaded when first needed
+        self._topScores = None
+
+    # queue a record, it is written to the log on the next flush.
+    # game - one of the GAME_ values
+    # settings - up to 4 game specific settings
+    # score - the score that ranks the record
+    # score2 - a second game specific score
+    # duration - length of the game in ms
+    # frameStats - a FrameStats or the tuple returned by FrameStats.getStats()
+    # abandoned - True if the player quit the game, the score is not ranked
+    def addRecord(self, game, settings, score, score2 = 0, duration = 0, frameStats = None, abandoned = False):
+        if (frameStats == None):
+            frameStats = (0, 0, 0, 0, 0)
+        elif (isinstance(frameStats, FrameStats)):
+            frameStats = frameStats.getStats()
+        timestamp = 0
+        if (utime != None):
+            timestamp = utime.time()
+        flags = [0, FLAG_ABANDONED][abandoned]
+        self._pending.append(packRecord(game, settings, score, score2, timestamp, duration, frameStats, flags))
+        if (self._topScores != None and not abandoned):
+            self.addToIndex(game, clamp(score, UINT16_MAX), clamp(duration, UINT32_MAX))
+
+    # write all the queued records to the log, compacting it if needed
+    def flush(self):
+        if (len(self._pending) == 0):
+            return
+        self.recover()
+        size = self.getLogSize()
+        # a partially written record would misalign everything appended after it
+        if (size % RECORD_SIZE != 0):
+            self.compact()
+            size = self.getLogSize()
+        count = size // RECORD_SIZE + len(self._pending)
+        f = open(self._path, "ab")
+        try:
+            for data in self._pending:
+                f.write(data)
+        finally:
+            f.close()
+        self._pending = []
+        if (count > self._compactAt):
+            self.compact()
+
+    # return the size of the log in bytes, 0 if the log doesn't exist
+    def getLogSize(self):
+        try:
+            return os.stat(self._path)[6]
+        except OSError:
+            return 0
+
+    # finish a compaction stopped by the hub being switched off. The old log is only removed
+    # once the compacted log has been written in full, so if there is no log the compacted
+    # log is complete, otherwise the compacted log may be partly written and is dropped.
+    def recover(self):
+        tmpPath = self._path + ".tmp"
+        if (not fileExists(tmpPath)):
+            return
+        if (fileExists(self._path)):
+            os.remove(tmpPath)
+        else:
+            os.rename(tmpPath, self._path)
+
+    # rewrite the log keeping the best records of each game and the most recent records,
+    # the other records are added into one summary record per game
+    def compact(self):
+        records = readRecords(self._path)
+        keep = set(range(max(0, len(records) - self._keepRecent), len(records)))
+        # find the best records of each game, the earlier record wins a tie
+        games = [i for i in range(0, len(records)) if isRanked(records[i])]
+        ranked = sorted(games, key = lambda i: (-records[i][FIELD_SCORE], i))
+        counts = {}
+        for i in ranked:
+            game = records[i][FIELD_GAME]
+            count = counts.get(game, 0)
+            if (count < self._topCount):
+                keep.add(i)
+                counts[game] = count + 1
+        # the old summaries and the dropped records go into the new summaries
+        summaries = {}
+        for i in range(0, len(records)):
+            if (isSummary(records[i]) or not (i in keep)):
+                game = records[i][FIELD_GAME]
+                if (not (game in summaries)):
+                    summaries[game] = [0] * 11
+                addToSummary(summaries[game], records[i])
+        tmpPath = self._path + ".tmp"
+        f = open(tmpPath, "wb")
+        try:
+            for game in sorted(summaries):
+                f.write(packSummary(game, summaries[game]))
+            for i in range(0, len(records)):
+                if (i in keep and not isSummary(records[i])):
+                    f.write(struct.pack(RECORD_FORMAT, *records[i]))
+        finally:
+            f.close()
+        # replace the log in one step where the file system allows it, otherwise the old log
+        # is removed first and recover() finishes the job if the hub is switched off in between
+        try:
+            os.rename(tmpPath, self._path)
+        except OSError:
+            os.remove(self._path)
+            os.rename(tmpPath, self._path)
+
+    # load the top scores index from the log and the records not flushed yet
+    def loadIndex(self):
+        self._topScores = {}
+        for record in readRecords(self._path):
+            if (isRanked(record)):
+                self.addToIndex(record[FIELD_GAME], record[FIELD_SCORE], record[FIELD_DURATION])
+        for data in self._pending:
+            record = struct.unpack(RECORD_FORMAT, data)
+            if (isRanked(record)):
+                self.addToIndex(record[FIELD_GAME], record[FIELD_SCORE], record[FIELD_DURATION])
+
+    # add a score to the top scores index
+    def addToIndex(self, game, score, duration):
+        scores = self._topScores.get(game)
+        if (scores == None):
+            scores = []
+            self._topScores[game] = scores
+        if (len(scores) >= self._topCount and score <= scores[-1][0]):
+            return
+        # keep the list sorted from the highest to the lowest score
+        i = 0
+        while (i < len(scores) and scores[i][0] >= score):
+            i = i + 1
+        scores.insert(i, (score, duration))
+        del scores[self._topCount:]
+
+    # return the top scores of a game as a list of (score, duration), highest first
+    def getTopScores(self, game):
+        if (self._topScores == None):
+            self.loadIndex()
+        return list(self._topScores.get(game, []))
+
+    # return the highest score of a game, 0 if the game has not been played
+    def getBestScore(self, game):
+        scores = self.getTopScores(game)
+        if (len(scores) == 0):
+            return 0
+        return scores[0][0]
@@ -0,0 +1,128 @@
+# --------------------------------------------------------------------------------
+#
+# querystats.py - summarise the game statistics logs written by gamestats.py
+#
+# This runs on a computer with CPython, not on the hub. Copy the gamestats.log file off
+# each hub (e.g. as alice.log, bob.log) and pass all of them to this script:
+#
+#   python querystats.py alice.log bob.log
+#   python querystats.py --game Snake --top 10 *.log
+#
+# By Chun Cheung Yim (cheungslegocreation@gmail.com)
+#
+# https://www.youtube.com/channel/UCbp55xmp7t4dhIjeSHD8FwA
+#
+# This work is licensed to you under the terms defined in Creative Commons Attribution-NonCommercial-NoDerivs (CC BY-NC-ND).
+# For more details on what this means, refer to
+#
+# https://creativecommons.org/licenses/by-nc-nd/4.0/
+#
+# --------------------------------------------------------------------------------
+
+import argparse
+import os
+import sys
+
+import gamestats
+
+
+# return the name of a game id
+def gameName(game):
+    return gamestats.GAME_NAMES.get(game, "Game" + str(game))
+
+
+# return the game id of a game name (case insensitive), None if the name is not known
+def gameId(name):
+    for (game, n) in gamestats.GAME_NAMES.items():
+        if (n.lower() == name.lower()):
+            return game
+    return None
+
+
+# load the records of all the logs, returns a list of (hubName, record). The hub name is
+# the file name of the log without its extension.
+def loadLogs(paths):
+    rows = []
+    for path in paths:
+        hubName = os.path.splitext(os.path.basename(path))[0]
+        for record in gamestats.readRecords(path):
+            rows.append((hubName, record))
+    return rows
+
+
+# aggregate the records per game, returns a dict of game id to a dict of totals
+def summarise(rows):
+    summary = {}
+    for (hubName, record) in rows:
+        game = record[gamestats.FIELD_GAME]
+        s = summary.get(game)
+        if (s == None):
+            s = {"totals": [0] * 11, "hubs": set(), "bestScore": 0}
+            summary[game] = s
+        s["hubs"].add(hubName)
+        # the summary records hold the totals of the records dropped when the log was compacted
+        gamestats.addToSummary(s["totals"], record)
+        if (gamestats.isRanked(record)):
+            s["bestScore"] = max(s["bestScore"], record[gamestats.FIELD_SCORE])
+    for s in summary.values():
+        totals = s["totals"]
+        s["games"] = totals[0]
+        s["abandoned"] = totals[10]
+        # the score and duration totals only include the finished games
+        s["finished"] = totals[0] - totals[10]
+        s["scoreTotal"] = totals[1]
+        s["score2Total"] = totals[2]
+        s["durationTotal"] = totals[4]
+        (s["frames"], s["inputMs"], s["updateMs"], s["renderMs"], s["maxFrameMs"]) = totals[5:10]
+    return summary
+
+
+# return the best finished games of a game as a list of (hubName, record), highest score first
+def topScores(rows, game, count):
+    gameRows = [row for row in rows if row[1][gamestats.FIELD_GAME] == game and gamestats.isRanked(row[1])]
+    gameRows.sort(key = lambda row: (-row[1][gamestats.FIELD_SCORE], row[1][gamestats.FIELD_DURATION]))
+    return gameRows[:count]
+
+
+# print the summary and the top scores of every game
+def printReport(rows, games, top, out = sys.stdout):
+    summary = summarise(rows)
+    for game in games:
+        s = summary.get(game)
+        if (s == None):
+            continue
+        frames = max(s["frames"], 1)
+        finished = max(s["finished"], 1)
+        out.write("%s - %d games (%d abandoned) on %d hubs\n" % (gameName(game), s["games"], s["abandoned"], len(s["hubs"])))
+        out.write("  finished games - best score: %d, average score: %.1f, average duration: %.1f s\n" % (
+            s["bestScore"], s["scoreTotal"] / finished, s["durationTotal"] / finished / 1000.0))
+        out.write("  frames: %d, ms per frame - input: %.2f, update: %.2f, render: %.2f, max frame: %d\n" % (
+            s["frames"], s["inputMs"] / frames, s["updateMs"] / frames, s["renderMs"] / frames, s["maxFrameMs"]))
+        out.write("  top %d:\n" % top)
+        for (hubName, record) in topScores(rows, game, top):
+            out.write("    %5d  %-12s %.1f s  settings %s\n" % (
+                record[gamestats.FIELD_SCORE], hubName, record[gamestats.FIELD_DURATION] / 1000.0,
+                record[gamestats.FIELD_SETTINGS:gamestats.FIELD_SETTINGS + 4]))
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Summarise the game statistics logs pulled from one or more hubs.")
+    parser.add_argument("logs", nargs = "+", help = "gamestats.log files, the file name is used as the hub name")
+    parser.add_argument("--game", help = "only report this game (e.g. Snake, AirHockey)")
+    parser.add_argument("--top", type = int, default = 5, help = "number of top scores to list per game")
+    args = parser.parse_args(argv)
+
+    rows = loadLogs(args.logs)
+    if (args.game != None):
+        game = gameId(args.game)
+        if (game == None):
+            parser.error("unknown game: " + args.game)
+        games = [game]
+    else:
+        games = sorted(set(record[gamestats.FIELD_GAME] for (hubName, record) in rows))
+    printReport(rows, games, args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,58 +13,77 @@
 #
 # --------------------------------------------------------------------------------
 
-from mindstorms import MSHub, Motor, MotorPair, ColorSensor, DistanceSensor, App
-from mindstorms.control import wait_for_seconds, wait_until, Timer
-import math
 import sys
 import urandom
+import utime
+import gamestats
+import gameruntime
+
+
+# the motor levels for moving up (level 0) and down (level 2), the motor is zeroed every frame
+# so the angle is how far it was turned since the last frame
+MOTOR_LIMITS = (19, -20)
+# a turn of half a rotation or more since the last frame is ignored
+MOTOR_MAX_TURN = 180
 
 
 # the Snake class
-class Snake:
+class Snake(gameruntime.Scene):
 
     # class constructor
     # speed - the speed of the game. The closer to 0 the faster the game is.
-    def __init__(self, speed):
+    # hal - the HAL used to reach the hub, a MindstormsHal is created if None
+    def __init__(self, speed, hal = None):
         self._body = [(0, 0)]        # the body of the snake, the coordinates are in (x, y)
         self._direction = 1        # 1 - right, 2 - down, 3 - left, 4 - up
         self._food_pos = (-1, -1)    # the current position of the food
-        self._motor = Motor('E')    # to allow the snake going up and down
-        self._hub = MSHub()        # hub class for lots of things :)
-        self._motor.set_degrees_counted(0)# reset the motor degree count
+        self._hal = hal or gameruntime.MindstormsHal()    # hub class for lots of things :)
+        self._runtime = gameruntime.Runtime(self._hal, ('E',), True)# motor E allows the snake going up and down
         self._points = 0            # number of food eaten
-        self._speed = speed        # the speed of the game
-
+        self.frameMs = int(speed * 1000)    # the speed of the game in ms
+        self._stats = gamestats.ScoreStore()    # high scores and game statistics
+        self._imgSnake = self._hal.loadImage('SNAKE')
+        self._imgSkull = self._hal.loadImage('SKULL')
+        self._imgHappy = self._hal.loadImage('HAPPY')
 
     # retrieve the next direction the snake is heading based on button press and motor rotation
-    def getNextDirectionFromKey(self):
-        if (self._hub.left_button.was_pressed()):
+    def getNextDirectionFromKey(self, input):
+        if (input.leftPressed):
             return 3
-        if (self._hub.right_button.was_pressed()):
+        if (input.rightPressed):
             return 1
-        temp = self._motor.get_degrees_counted()
-        if (temp >= 20 and temp < 180):
-            return 4
-        if (temp > -180 and temp <= -20):
-            return 2
-        # no change detected, return the current direction, also reset the motor's current degree
-        # value for detecting the next round of up/down movement
+        angle = input.angles[0]
+        if (angle > -MOTOR_MAX_TURN and angle < MOTOR_MAX_TURN):
+            level = gameruntime.getMotorLevel(angle, MOTOR_LIMITS)
+            if (level == 0):
+                return 4
+            if (level == 2):
+                return 2
+        # no change detected, return the current direction
         return self._direction
 
+    # move the snake by one step, returns the points when the game is over
+    def update(self, input):
+        self._direction = self.getNextDirectionFromKey(input)
+        self.updateBody(self._direction)
+        if self.exitConditionReached():
+            return self._points
+        return None
+
     # show the body of the snake
-    def show(self):
-        self._hub.light_matrix.off()
+    def draw(self, renderer):
+        renderer.clear()
         isHead = True
         # print the body of the snake
         for (x, y) in self._body:
             if (isHead):
-                self._hub.light_matrix.set_pixel(x, y, 80)
+                renderer.setPixel(x, y, 8)
                 isHead = False
             else:
-                self._hub.light_matrix.set_pixel(x, y, 70)
+                renderer.setPixel(x, y, 7)
         # print the food position
         if (self._food_pos[0] >= 0 and self._food_pos[1] >= 0):
-            self._hub.light_matrix.set_pixel(self._food_pos[0], self._food_pos[1], 100)
+            renderer.setPixel(self._food_pos[0], self._food_pos[1], 9)
 
     # generate the next food position
     def getNextFoodPos(self):
@@ -93,7 +112,7 @@ class Snake:
         self._body.insert(0, (x, y))
         if (self._food_pos == (x, y)):
             self._points = self._points + 1
-            self._hub.speaker.beep(60, 0.2, 100)
+            self._hal.beep(262, 200, 100)
             self._body = self._body[:11]    # limit the length of the snake to 11 (including the head)
             self.getNextFoodPos()
         else:
@@ -122,36 +141,39 @@ class Snake:
         # render the opening sequence
         for c in range(0, 3):
             for i in range(0, 5):
-                self._hub.light_matrix.show_image('SNAKE', 20 * (i + 1))
-                wait_for_seconds(0.2)
+                self._hal.showImage(self._imgSnake, [2, 4, 6, 8, 9][i])
+                self._hal.sleepMs(200)
         for i in range(3, 0, -1):
-            self._hub.light_matrix.write(i)
-            self._hub.speaker.beep(70, 0.25, 80)
-            wait_for_seconds(1)
-        self._hub.speaker.beep(90, 0.25, 80)
+            self._hal.write(i)
+            self._hal.beep(466, 250, 80)
+            self._hal.sleepMs(1000)
+        self._hal.beep(1480, 250, 80)
 
     # start the game
     def run(self):
-        exit = False
         self.openingTitleSequence()
         self.getNextFoodPos()
-        self.show()
-        while (exit == False):
-            self._direction = self.getNextDirectionFromKey()
-            self._motor.set_degrees_counted(0)
-            self.updateBody(self._direction)
-            if self.exitConditionReached():
-                exit = True
-                self._hub.light_matrix.show_image('SKULL')
-                self._hub.speaker.play_sound('Oh Oh', 100)
-                self._hub.light_matrix.off()
-                self._hub.light_matrix.write(str(self._points))
-                wait_for_seconds(1)
-            else:
-                self.show()
-                wait_for_seconds(self._speed)
+        startTime = utime.ticks_ms()
+        # the starting position is shown for one frame before the snake moves
+        self._runtime.run(self, True)
+        gameruntime.showGameOver(self._hal, self._imgSkull, 'Oh Oh', self._points)
+        self.saveStats(utime.ticks_diff(utime.ticks_ms(), startTime))
+
+    # save the result of the game and show the high score
+    # duration - length of the game in ms
+    def saveStats(self, duration):
+        bestScore = self._stats.getBestScore(gamestats.GAME_SNAKE)
+        self._stats.addRecord(gamestats.GAME_SNAKE, (self.frameMs,), self._points, len(self._body), duration, self._runtime.frameStats)
+        self._stats.flush()
+        if (self._points > bestScore):
+            self._hal.showImage(self._imgHappy)
+            self._hal.beep(1480, 250, 80)
+            self._hal.sleepMs(1000)
+        self._hal.write('HI ' + str(max(self._points, bestScore)))
+        self._hal.sleepMs(1000)
 
-# start the game
-snake = Snake(0.3)
-snake.run()
-sys.exit()
\ No newline at end of file
+# start the game, unless benchgames.py is only measuring this file
+if (not ("benchgames" in sys.modules)):
+    snake = Snake(0.3)
+    snake.run()
+    sys.exit()
\ No newline at end of file
@@ -0,0 +1,120 @@
+# --------------------------------------------------------------------------------
+#
+# test_gamestats.py - checks of the statistics log written by gamestats.py
+#
+# This runs on a computer with CPython, not on the hub:
+#
+#   python -m unittest test_gamestats
+#
+# By Chun Cheung Yim (cheungslegocreation@gmail.com)
+#
+# https://www.youtube.com/channel/UCbp55xmp7t4dhIjeSHD8FwA
+#
+# This work is licensed to you under the terms defined in Creative Commons Attribution-NonCommercial-NoDerivs (CC BY-NC-ND).
+# For more details on what this means, refer to
+#
+# https://creativecommons.org/licenses/by-nc-nd/4.0/
+#
+# --------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import gamestats
+
+
+# add up the totals of all the records in a log
+def getTotals(path):
+    totals = [0] * 11
+    for record in gamestats.readRecords(path):
+        gamestats.addToSummary(totals, record)
+    return totals
+
+
+class ScoreStoreTest(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._path = os.path.join(self._dir, "gamestats.log")
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    # add the games to a store, flushing after each one as the games do
+    def addGames(self, store, scores, game = gamestats.GAME_SNAKE):
+        for score in scores:
+            store.addRecord(game, (300,), score, 1, 1000 + score, (10, 1, 2, 3, 4))
+            store.flush()
+
+    def testCompactionKeepsTotals(self):
+        scores = [(i * 7) % 13 for i in range(0, 27)]
+        store = gamestats.ScoreStore(self._path, topCount = 3, compactAt = 10, keepRecent = 2)
+        self.addGames(store, scores)
+        records = gamestats.readRecords(self._path)
+        self.assertLess(len(records), len(scores))
+        self.assertTrue(any(gamestats.isSummary(record) for record in records))
+        totals = getTotals(self._path)
+        self.assertEqual(totals[0], len(scores))
+        self.assertEqual(totals[1], sum(scores))
+        self.assertEqual(totals[4], sum(1000 + score for score in scores))
+        self.assertEqual(totals[5], 10 * len(scores))
+        # the best scores survive the compaction and the summaries are not ranked
+        best = sorted(scores, reverse = True)[:3]
+        self.assertEqual([score for (score, duration) in store.getTopScores(gamestats.GAME_SNAKE)], best)
+        reloaded = gamestats.ScoreStore(self._path, topCount = 3)
+        self.assertEqual([score for (score, duration) in reloaded.getTopScores(gamestats.GAME_SNAKE)], best)
+
+    def testAbandonedGamesAreNotRanked(self):
+        store = gamestats.ScoreStore(self._path, compactAt = 3, keepRecent = 1)
+        store.addRecord(gamestats.GAME_AIR_HOCKEY, (1, 3), 2, 2, 5000)
+        store.addRecord(gamestats.GAME_AIR_HOCKEY, (1, 3), 9, 9, 7000, abandoned = True)
+        store.flush()
+        self.addGames(store, [1, 2, 3])
+        self.assertEqual(gamestats.ScoreStore(self._path).getBestScore(gamestats.GAME_AIR_HOCKEY), 2)
+        totals = getTotals(self._path)
+        self.assertEqual(totals[10], 1)
+        # the abandoned game is counted but not in the score and duration totals
+        airHockey = [0] * 11
+        for record in gamestats.readRecords(self._path):
+            if (record[gamestats.FIELD_GAME] == gamestats.GAME_AIR_HOCKEY):
+                gamestats.addToSummary(airHockey, record)
+        self.assertEqual((airHockey[0], airHockey[1], airHockey[4], airHockey[10]), (2, 2, 5000, 1))
+
+    def testTruncatedLastRecord(self):
+        store = gamestats.ScoreStore(self._path)
+        self.addGames(store, [4, 5])
+        # the hub was switched off while the last record was written
+        with open(self._path, "ab") as f:
+            f.write(b"\xa5\x01\x02")
+        self.assertEqual([record[gamestats.FIELD_SCORE] for record in gamestats.readRecords(self._path)], [4, 5])
+        # the next flush drops the partial record so the new record is aligned
+        self.addGames(store, [6])
+        self.assertEqual(os.path.getsize(self._path) % gamestats.RECORD_SIZE, 0)
+        self.assertEqual([record[gamestats.FIELD_SCORE] for record in gamestats.readRecords(self._path)], [4, 5, 6])
+
+    def testLeftoverTmpWithoutLog(self):
+        store = gamestats.ScoreStore(self._path)
+        self.addGames(store, [4, 5])
+        # the hub was switched off after the old log was removed, before the rename
+        os.rename(self._path, self._path + ".tmp")
+        self.assertEqual(len(gamestats.readRecords(self._path)), 2)
+        self.assertEqual(gamestats.ScoreStore(self._path).getBestScore(gamestats.GAME_SNAKE), 5)
+        self.addGames(store, [6])
+        self.assertFalse(os.path.exists(self._path + ".tmp"))
+        self.assertEqual([record[gamestats.FIELD_SCORE] for record in gamestats.readRecords(self._path)], [4, 5, 6])
+
+    def testLeftoverTmpWithLog(self):
+        store = gamestats.ScoreStore(self._path)
+        self.addGames(store, [4, 5])
+        # the hub was switched off while the compacted log was written
+        with open(self._path + ".tmp", "wb") as f:
+            f.write(b"\xa5\x01")
+        self.assertEqual(len(gamestats.readRecords(self._path)), 2)
+        self.addGames(store, [6])
+        self.assertFalse(os.path.exists(self._path + ".tmp"))
+        self.assertEqual([record[gamestats.FIELD_SCORE] for record in gamestats.readRecords(self._path)], [4, 5, 6])
+
+
+if __name__ == "__main__":
+    unittest.main()